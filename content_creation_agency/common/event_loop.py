@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+# Synchronous tool runs all go through one background event loop, so clients
+# bound to it (and their keep-alive pools) are built once per process. Unlike
+# asyncio.run, this also works when run() is called from async code.
+_LOOP_LOCK = threading.Lock()
+_LOOP = None
+
+def background_loop():
+    """Returns the shared event loop, starting it on a daemon thread on first use"""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="cca-event-loop", daemon=True).start()
+        return _LOOP
+
+def is_background_loop(loop):
+    return loop is _LOOP
+
+def run_sync(coro):
+    """Runs a coroutine on the background loop and blocks until it returns"""
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None and is_background_loop(running):
+        coro.close()
+        # Blocking here would wait on the very loop that has to run the coroutine
+        raise RuntimeError("run_sync cannot be called from the background loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, background_loop()).result()
@@ -0,0 +1,67 @@
+import os
+import json
+import hashlib
+import diskcache
+from openai.types.chat import ChatCompletion
+
+# Exact-match cache for chat completions, shared by all tools on this machine
+CACHE_DIR = os.path.expanduser("~/.cache/cca_llm")
+TTL = 7 * 24 * 60 * 60  # 7 days
+
+_cache = diskcache.Cache(CACHE_DIR)
+
+stats = {"hits": 0, "misses": 0}
+
+def _cache_key(kwargs):
+    """Hashes the full request (model, messages, response_format, temperature, ...)"""
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode()).hexdigest()
+
+def _is_cacheable(kwargs):
+    """Only deterministic requests can be replayed: temperature 0 or a fixed seed"""
+    return kwargs.get("temperature", 1) == 0 or kwargs.get("seed") is not None
+
+def _lookup(key):
+    cached = _cache.get(key)
+    if cached is None:
+        stats["misses"] += 1
+        return None
+    stats["hits"] += 1
+    return ChatCompletion.model_validate_json(cached)
+
+def _store(key, response):
+    _cache.set(key, response.model_dump_json(), expire=TTL)
+
+def cached_chat_completion(client, validate=None, **kwargs):
+    """
+    Drop-in replacement for client.chat.completions.create that serves
+    repeated deterministic requests from the on-disk cache. If validate is
+    given, a response is only stored once validate(response) returns without
+    raising, so a malformed completion is not replayed on every later run.
+    """
+    if not _is_cacheable(kwargs):
+        return client.chat.completions.create(**kwargs)
+    
+    key = _cache_key(kwargs)
+    response = _lookup(key)
+    if response is None:
+        response = client.chat.completions.create(**kwargs)
+        if validate is not None:
+            validate(response)
+        _store(key, response)
+    return response
+
+async def acached_chat_completion(client, validate=None, **kwargs):
+    """
+    Async counterpart of cached_chat_completion for openai.AsyncOpenAI clients
+    """
+    if not _is_cacheable(kwargs):
+        return await client.chat.completions.create(**kwargs)
+    
+    key = _cache_key(kwargs)
+    response = _lookup(key)
+    if response is None:
+        response = await client.chat.completions.create(**kwargs)
+        if validate is not None:
+            validate(response)
+        _store(key, response)
+    return response
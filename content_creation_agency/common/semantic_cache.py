@@ -0,0 +1,274 @@
+import os
+import json
+import math
+import time
+import base64
+import logging
+import tempfile
+import threading
+import numpy as np
+import faiss
+
+# Semantic cache: near-duplicate requests are answered with a stored response
+CACHE_DIR = os.path.expanduser("~/.cache/cca_semantic")
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 512  # truncated text-embedding-3-small vectors
+SIMILARITY_THRESHOLD = 0.95
+SEARCH_K = 16  # neighbours fetched per search before widening
+
+# Entries expire after 30 days; past MAX_ENTRIES the oldest are evicted down to EVICT_TO of the cap
+TTL = 30 * 24 * 60 * 60
+MAX_ENTRIES = 100_000
+EVICT_TO = 0.9
+
+# Past this many entries the flat index is swapped for a product-quantized one
+PQ_THRESHOLD = 50_000
+PQ_SUBQUANTIZERS = 64
+PQ_BITS = 8
+
+logger = logging.getLogger(__name__)
+
+def _round_sig(value, digits=2):
+    """Rounds a number to the given significant figures"""
+    if value == 0 or not math.isfinite(value):
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+def _normalize(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return _round_sig(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+def canonicalize(payload):
+    """
+    Serializes a payload with sorted keys and numbers rounded to 2 significant
+    figures, so cosmetic differences map to the same string
+    """
+    return json.dumps(_normalize(payload), sort_keys=True, default=str)
+
+def write_atomic(path, write):
+    """
+    Calls write(temp_path) on a temporary file next to path and renames it over
+    path, so a crash mid-write never leaves a truncated cache file behind
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def write_json_atomic(path, data):
+    def write(temp_path):
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    write_atomic(path, write)
+
+def _exact_key(exact):
+    """Exact slots are compared verbatim, without canonicalize's rounding"""
+    return json.dumps(exact or {}, sort_keys=True, default=str)
+
+class SemanticLLMCache:
+    """
+    Embedding-indexed response cache backed by a FAISS inner-product index.
+    Vectors are unit length, so inner product equals cosine similarity.
+    Each response is stored with exact-match slots (e.g. the model), and only
+    entries whose slots are equal take part in the similarity search.
+    
+    Entries live in an append-only JSON lines log that is only rewritten when
+    expired or excess entries are dropped. Memory holds the index plus each
+    entry's log offset; responses are read back from disk on a hit.
+    
+    The cache fails open: embedding or storage errors are logged and treated
+    as a miss, so they never stop the caller from generating a response.
+    """
+
+    def __init__(self, client, name, threshold=SIMILARITY_THRESHOLD, cache_dir=CACHE_DIR,
+                 ttl=TTL, max_entries=MAX_ENTRIES):
+        self.client = client
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._path = os.path.join(cache_dir, f"{name}.jsonl")
+        self._lock = threading.Lock()
+        self._last_embedding = (None, None)
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        self._reset()
+        if os.path.exists(self._path):
+            try:
+                self._load()
+            except (OSError, ValueError, RuntimeError):
+                logger.warning("Discarding unreadable semantic cache %s", self._path, exc_info=True)
+                self._reset()
+
+    def _reset(self):
+        self.index = faiss.IndexFlatIP(EMBEDDING_DIM)
+        # (offset, length, created, exact key) of each log line, in index id order
+        self._entries = []
+        self._ids_by_exact = {}
+
+    def _load(self):
+        """Rebuilds the index from the log, dropping expired, excess and unreadable lines"""
+        cutoff = time.time() - self.ttl
+        entries, vectors = [], []
+        dropped = False
+        with open(self._path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    vector = np.frombuffer(base64.b64decode(record["vector"]), dtype=np.float32)
+                except (ValueError, KeyError, TypeError):
+                    # A crash mid-append leaves a truncated last line
+                    record, vector = None, None
+                if record is None or vector.size != EMBEDDING_DIM or record["created"] < cutoff:
+                    dropped = True
+                else:
+                    entries.append((offset, len(line), record["created"], _exact_key(record["exact"])))
+                    vectors.append(vector)
+                offset += len(line)
+        
+        if len(entries) > self.max_entries:
+            dropped = True
+            entries, vectors = entries[-self.max_entries:], vectors[-self.max_entries:]
+        if dropped:
+            entries = self._rewrite(entries)
+        if vectors:
+            self._build_index(np.vstack(vectors))
+        self._entries = entries
+        self._index_exact()
+
+    def _build_index(self, vectors):
+        if len(vectors) >= PQ_THRESHOLD:
+            self.index = faiss.IndexPQ(EMBEDDING_DIM, PQ_SUBQUANTIZERS, PQ_BITS, faiss.METRIC_INNER_PRODUCT)
+            self.index.train(vectors)
+        else:
+            self.index = faiss.IndexFlatIP(EMBEDDING_DIM)
+        self.index.add(vectors)
+
+    def _index_exact(self):
+        self._ids_by_exact = {}
+        for i, (_, _, _, key) in enumerate(self._entries):
+            self._ids_by_exact.setdefault(key, set()).add(i)
+
+    def _rewrite(self, entries):
+        """Atomically replaces the log with the given lines, returning their new entries"""
+        rewritten = []
+        def write(temp_path):
+            with open(self._path, "rb") as src, open(temp_path, "wb") as dst:
+                for offset, length, created, key in entries:
+                    src.seek(offset)
+                    rewritten.append((dst.tell(), length, created, key))
+                    dst.write(src.read(length))
+        write_atomic(self._path, write)
+        return rewritten
+
+    def _read_response(self, i):
+        offset, length, _, _ = self._entries[i]
+        with open(self._path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))["response"]
+
+    def _embed(self, canonical):
+        """Embeds the canonical string, reusing the last vector for a get/put pair"""
+        # One read of the pair, so a concurrent run cannot swap the vector after the check
+        last_canonical, last_vector = self._last_embedding
+        if last_canonical == canonical:
+            return last_vector
+        
+        response = self.client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=canonical,
+            dimensions=EMBEDDING_DIM
+        )
+        vector = np.asarray([response.data[0].embedding], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        self._last_embedding = (canonical, vector)
+        return vector
+
+    def get(self, canonical, exact=None):
+        """Returns the cached response of the most similar live entry with equal exact slots, or None"""
+        try:
+            return self._get(canonical, exact)
+        except Exception:
+            logger.warning("Semantic cache lookup failed, treating it as a miss", exc_info=True)
+            return None
+
+    def _get(self, canonical, exact):
+        key = _exact_key(exact)
+        with self._lock:
+            if key not in self._ids_by_exact:
+                return None
+        
+        vector = self._embed(canonical)
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            # Neighbours come back best first, so the first live one in the exact-slot group
+            # is its best match; the search only widens while scores clear the threshold
+            group = self._ids_by_exact.get(key, ())
+            k = SEARCH_K
+            while True:
+                scores, ids = self.index.search(vector, min(k, self.index.ntotal))
+                for score, i in zip(scores[0], ids[0]):
+                    if score < self.threshold:
+                        return None
+                    if i in group and self._entries[i][2] >= cutoff:
+                        return self._read_response(i)
+                if k >= self.index.ntotal:
+                    return None
+                k *= 4
+
+    def put(self, canonical, response, exact=None):
+        """Appends a response and its exact slots to the log and the index"""
+        try:
+            self._put(canonical, response, exact)
+        except Exception:
+            logger.warning("Semantic cache store failed, the response is not cached", exc_info=True)
+
+    def _put(self, canonical, response, exact):
+        exact = exact or {}
+        vector = self._embed(canonical)
+        created = time.time()
+        line = (json.dumps({
+            "created": created,
+            "exact": exact,
+            "vector": base64.b64encode(vector.tobytes()).decode("ascii"),
+            "response": response
+        }) + "\n").encode("utf-8")
+        with self._lock:
+            with open(self._path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+            key = _exact_key(exact)
+            self._ids_by_exact.setdefault(key, set()).add(self.index.ntotal)
+            self._entries.append((offset, len(line), created, key))
+            self.index.add(vector)
+            if len(self._entries) > self.max_entries:
+                self._evict()
+            if self.index.ntotal >= PQ_THRESHOLD and isinstance(self.index, faiss.IndexFlatIP):
+                self._compress()
+
+    def _evict(self):
+        """Drops the oldest entries down to EVICT_TO of the cap, so the log is rewritten only now and then"""
+        drop = len(self._entries) - int(self.max_entries * EVICT_TO)
+        self.index.remove_ids(faiss.IDSelectorRange(0, drop))
+        self._entries = self._rewrite(self._entries[drop:])
+        self._index_exact()
+
+    def _compress(self):
+        """Re-encodes the flat index as an IndexPQ, 8x smaller at 64 bytes per vector"""
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        index = faiss.IndexPQ(EMBEDDING_DIM, PQ_SUBQUANTIZERS, PQ_BITS, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.add(vectors)
+        self.index = index
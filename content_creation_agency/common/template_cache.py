@@ -0,0 +1,117 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+from content_creation_agency.common.semantic_cache import (
+    CACHE_DIR, EMBEDDING_DIM, EMBEDDING_MODEL, canonicalize, write_json_atomic
+)
+
+# Per-slot cosine similarity required to reuse a stored response skeleton
+SLOT_SIMILARITY_THRESHOLD = 0.85
+
+logger = logging.getLogger(__name__)
+
+class TemplateResponseCache:
+    """
+    Variation-aware cache for prompts rendered from a template with named slots.
+    Text slots are matched by embedding similarity, every other slot must match
+    exactly. A hit returns the stored response skeleton, which the caller patches
+    for the new slot values instead of regenerating it from scratch.
+    Like SemanticLLMCache it fails open, logging errors and reporting a miss.
+    """
+
+    def __init__(self, client, template_id, text_slots, threshold=SLOT_SIMILARITY_THRESHOLD,
+                 cache_dir=CACHE_DIR):
+        self.client = client
+        self.template_id = template_id
+        self.text_slots = tuple(sorted(text_slots))
+        self.threshold = threshold
+        self._path = os.path.join(cache_dir, f"{template_id}.skeletons.json")
+        self._lock = threading.Lock()
+        self._last_embedding = (None, None)
+        self.entries = []
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self._path):
+            try:
+                self._load()
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.warning("Discarding unreadable skeleton cache %s", self._path, exc_info=True)
+                self.entries = []
+
+    def _load(self):
+        with open(self._path, encoding="utf-8") as f:
+            stored = json.load(f)
+        # Entries registered under a different slot schema or embedding size are not comparable
+        if stored.get("slot_schema") == list(self.text_slots) and stored.get("dimensions") == EMBEDDING_DIM:
+            self.entries = [
+                {**entry, "vectors": np.asarray(entry["vectors"], dtype=np.float32)}
+                for entry in stored["entries"]
+            ]
+
+    def _split(self, slots):
+        texts = [canonicalize(slots[name]) for name in self.text_slots]
+        exact = {k: v for k, v in slots.items() if k not in self.text_slots}
+        return texts, exact
+
+    def _embed(self, texts):
+        """Embeds all text slots in one request, one unit vector per slot"""
+        # One read of the pair, so a concurrent run cannot swap the vectors after the check
+        last_texts, last_vectors = self._last_embedding
+        if last_texts == texts:
+            return last_vectors
+        
+        response = self.client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=texts,
+            dimensions=EMBEDDING_DIM
+        )
+        vectors = np.asarray([d.embedding for d in response.data], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self._last_embedding = (texts, vectors)
+        return vectors
+
+    def get(self, slots):
+        """Returns the skeleton whose weakest slot similarity is highest, or None"""
+        try:
+            return self._get(slots)
+        except Exception:
+            logger.warning("Skeleton cache lookup failed, treating it as a miss", exc_info=True)
+            return None
+
+    def _get(self, slots):
+        texts, exact = self._split(slots)
+        with self._lock:
+            candidates = [entry for entry in self.entries if entry["exact"] == exact]
+        if not candidates:
+            return None
+        
+        vectors = self._embed(texts)
+        scores = [float((vectors * entry["vectors"]).sum(axis=1).min()) for entry in candidates]
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            return candidates[best]["skeleton"]
+        return None
+
+    def put(self, slots, skeleton):
+        """Registers a response skeleton for the given slot values"""
+        try:
+            self._put(slots, skeleton)
+        except Exception:
+            logger.warning("Skeleton cache store failed, the skeleton is not registered", exc_info=True)
+
+    def _put(self, slots, skeleton):
+        texts, exact = self._split(slots)
+        vectors = self._embed(texts)
+        with self._lock:
+            self.entries.append({"exact": exact, "vectors": vectors, "skeleton": skeleton})
+            write_json_atomic(self._path, {
+                "template_id": self.template_id,
+                "slot_schema": list(self.text_slots),
+                "dimensions": EMBEDDING_DIM,
+                "entries": [
+                    {**entry, "vectors": entry["vectors"].tolist()}
+                    for entry in self.entries
+                ]
+            })
@@ -0,0 +1,86 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qsl
+from functools import lru_cache
+import numpy as np
+import httplib2
+from cachetools import TTLCache
+from googleapiclient.discovery import build
+
+# RFC 3339 timestamps as returned by the Data API (publishedAt)
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Concurrent YouTube Data API requests, capped to avoid quota bursts
+MAX_WORKERS = 8
+
+# Responses are reused for an hour (search results for 10 minutes) to spare the daily quota
+CACHE_SIZE = 10_000
+CACHE_TTL = 60 * 60
+SEARCH_CACHE_TTL = 10 * 60
+
+_local = threading.local()
+_cache_lock = threading.Lock()
+_cache = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+_search_cache = TTLCache(maxsize=CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+@lru_cache(maxsize=1)
+def youtube_service():
+    """
+    Data API client, built once per process and shared by all tools. The
+    discovery document bundled with googleapiclient is used, so building
+    never fetches it over the network.
+    """
+    return build(
+        'youtube', 'v3',
+        developerKey=os.getenv('YOUTUBE_API_KEY'),
+        static_discovery=True,
+        cache_discovery=False
+    )
+
+def _http():
+    """httplib2.Http is not thread-safe, so every worker thread gets its own"""
+    if not hasattr(_local, "http"):
+        _local.http = httplib2.Http()
+    return _local.http
+
+def _cache_for(request):
+    return _search_cache if request.methodId == "youtube.search.list" else _cache
+
+def _cache_key(request):
+    """Endpoint plus sorted query parameters, so argument order does not matter"""
+    return request.methodId, tuple(sorted(parse_qsl(urlparse(request.uri).query)))
+
+def execute(request):
+    """
+    Executes a googleapiclient request on the calling thread's connection,
+    serving repeats within the TTL from memory
+    """
+    cache = _cache_for(request)
+    key = _cache_key(request)
+    with _cache_lock:
+        response = cache.get(key)
+    if response is None:
+        response = request.execute(http=_http())
+        with _cache_lock:
+            cache[key] = response
+    return response
+
+def map_concurrent(fn, items, max_workers=MAX_WORKERS):
+    """Runs fn over items on the shared worker cap, returning results in order"""
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+def execute_all(requests, max_workers=MAX_WORKERS):
+    """Executes independent requests concurrently, returning responses in order"""
+    return map_concurrent(execute, requests, max_workers)
+
+def count_array(values):
+    """Statistics counts as int32, widening to int64 only if a count does not fit"""
+    counts = np.asarray(values, dtype=np.int64)
+    if counts.size and counts.max() > np.iinfo(np.int32).max:
+        return counts
+    return counts.astype(np.int32)
@@ -3,13 +3,140 @@ from pydantic import Field
 import os
 from dotenv import load_dotenv
 import openai
+import httpx
 import json
+import asyncio
+import weakref
+import ijson
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+from jinja2 import Environment, FileSystemLoader
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from content_creation_agency.common.event_loop import is_background_loop, run_sync
+from content_creation_agency.common.llm_cache import acached_chat_completion
+from content_creation_agency.common.semantic_cache import SemanticLLMCache, canonicalize
+from content_creation_agency.common.template_cache import TemplateResponseCache
 
 load_dotenv()
 
+PROMPT_TEMPLATE = "content_idea_prompt.j2"
+GENERATION_MODEL = "gpt-4o-mini"
+PATCH_MODEL = "gpt-4o-mini"
+
+SYSTEM_PROMPT = """You are an expert AI content strategist specializing in creating engaging 
+educational content about artificial intelligence and technology. Your task is to generate 
+unique content ideas that:
+1. Align with current trends and audience interests
+2. Fill identified content gaps
+3. Have high potential for engagement
+4. Build upon successful past content
+5. Offer unique perspectives or insights
+
+Format your response as a JSON object with the following structure:
+{
+    "content_ideas": [
+        {
+            "title": "Engaging title",
+            "hook": "Attention-grabbing opening hook",
+            "key_points": ["point1", "point2", "point3"],
+            "target_audience": "Description of target audience",
+            "estimated_engagement": "High/Medium/Low with reasoning",
+            "trend_alignment": "How it aligns with current trends",
+            "differentiation": "What makes this unique"
+        }
+    ]
+}"""
+
+PATCH_PROMPT = """Below is a response previously generated for similar input data, followed by
+the current request. Adapt the previous response to the current data: update titles, hooks,
+key points and trend references wherever the new trends or YouTube metrics differ, and keep
+everything else. Respond with the same JSON structure.
+
+Previous response:
+{skeleton}
+
+Current request:
+{prompt}"""
+
+_prompts = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prompts"))
+)
+
+# Async client of the shared background loop, built once and kept for the whole process
+_LOOP_CLIENT = None
+
+# Async clients are bound to the event loop that created their connection pool.
+# On caller-owned loops one client is shared by the runs in flight on that loop
+# and closed when the last of them finishes: loop -> [client, active runs].
+_CALLER_CLIENTS = weakref.WeakKeyDictionary()
+
+def _new_async_client():
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20, max_connections=40))
+    )
+
+@asynccontextmanager
+async def _async_client():
+    global _LOOP_CLIENT
+    loop = asyncio.get_running_loop()
+    if is_background_loop(loop):
+        # Only ever touched from the background loop's thread
+        if _LOOP_CLIENT is None:
+            _LOOP_CLIENT = _new_async_client()
+        yield _LOOP_CLIENT
+        return
+    
+    entry = _CALLER_CLIENTS.get(loop)
+    if entry is None:
+        entry = _CALLER_CLIENTS[loop] = [_new_async_client(), 0]
+    entry[1] += 1
+    try:
+        yield entry[0]
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _CALLER_CLIENTS[loop]
+            await entry[0].close()
+
+# Synchronous client for the cache embeddings, shared by every run
+@lru_cache(maxsize=1)
+def _client():
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=20, max_connections=40))
+    )
+
+@lru_cache(maxsize=1)
+def _semantic_cache():
+    return SemanticLLMCache(_client(), "content_ideas")
+
+@lru_cache(maxsize=1)
+def _template_cache():
+    return TemplateResponseCache(
+        _client(),
+        PROMPT_TEMPLATE,
+        text_slots=["trends_data", "youtube_data"]
+    )
+
+class _CompletionStreamReader:
+    """Async file-like view of a streamed completion, consumed by ijson"""
+
+    def __init__(self, stream):
+        self._chunks = stream.__aiter__()
+
+    async def read(self, size=-1):
+        if size == 0:
+            return b""
+        async for chunk in self._chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                return chunk.choices[0].delta.content.encode("utf-8")
+        return b""
+
 class ContentGenerator(BaseTool):
     """
-    Generates content ideas using OpenAI's latest GPT-4 Turbo preview model with enhanced
+    Generates content ideas using OpenAI's GPT models (gpt-4o-mini by default) with enhanced
     prompt engineering and structured output.
     """
     trends_data: dict = Field(
@@ -24,57 +151,144 @@ class ContentGenerator(BaseTool):
         default=5,
         description="Number of content ideas to generate"
     )
+    model: str = Field(
+        default=GENERATION_MODEL,
+        description="Model for full generations; set 'gpt-4-0125-preview' only when the slower, costlier model is needed"
+    )
 
     def run(self):
         """
         Generates content ideas using OpenAI's API with structured prompting
         """
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return run_sync(self.arun())
+
+    async def arun(self):
+        """
+        Async variant of run, so several generators can share one event loop
+        """
+        slots = self._slots()
         
-        system_prompt = """You are an expert AI content strategist specializing in creating engaging 
-        educational content about artificial intelligence and technology. Your task is to generate 
-        unique content ideas that:
-        1. Align with current trends and audience interests
-        2. Fill identified content gaps
-        3. Have high potential for engagement
-        4. Build upon successful past content
-        5. Offer unique perspectives or insights
-
-        Format your response as a JSON object with the following structure:
-        {
-            "content_ideas": [
-                {
-                    "title": "Engaging title",
-                    "hook": "Attention-grabbing opening hook",
-                    "key_points": ["point1", "point2", "point3"],
-                    "target_audience": "Description of target audience",
-                    "estimated_engagement": "High/Medium/Low with reasoning",
-                    "trend_alignment": "How it aligns with current trends",
-                    "differentiation": "What makes this unique"
-                }
-            ]
-        }"""
-
-        prompt = f"""Based on the following data:
-
-        Trends Analysis: {json.dumps(self.trends_data, indent=2)}
-        YouTube Performance: {json.dumps(self.youtube_data, indent=2)}
-
-        Generate {self.num_ideas} unique content ideas that leverage these insights and fill identified gaps.
-        Focus on topics that show high trend potential but aren't oversaturated."""
+        # Near-identical inputs reuse previously generated ideas
+        canonical = canonicalize(slots)
+        cached = await asyncio.to_thread(_semantic_cache().get, canonical, self._exact_slots())
+        if self._is_complete(cached):
+            return json.dumps(cached)
         
-        response = client.chat.completions.create(
-            model="gpt-4-0125-preview",
-            messages=[
-                {"role": "system", "content": system_prompt},
+        model, prompt, skeleton = await self._plan(slots)
+        async with _async_client() as client:
+            content = await self._complete(client, model, prompt)
+        
+        try:
+            ideas = json.loads(content)
+        except json.JSONDecodeError:
+            return content
+        
+        await self._remember(slots, canonical, ideas, skeleton)
+        return content
+
+    async def astream(self) -> AsyncIterator[dict]:
+        """
+        Streams the generation and yields each content idea as soon as it is
+        complete, so downstream tools can start on the first idea early:
+
+            async for idea in ContentGenerator(...).astream(): ...
+        """
+        slots = self._slots()
+        
+        canonical = canonicalize(slots)
+        cached = await asyncio.to_thread(_semantic_cache().get, canonical, self._exact_slots())
+        if self._is_complete(cached):
+            for idea in cached["content_ideas"]:
+                yield idea
+            return
+        
+        model, prompt, skeleton = await self._plan(slots)
+        ideas = []
+        # The client has to stay open until the stream is fully consumed
+        async with _async_client() as client:
+            stream = await self._complete(client, model, prompt, stream=True)
+            reader = _CompletionStreamReader(stream)
+            async for idea in ijson.items(reader, "content_ideas.item", use_float=True):
+                ideas.append(idea)
+                yield idea
+        
+        await self._remember(slots, canonical, {"content_ideas": ideas}, skeleton)
+
+    def _slots(self):
+        return {
+            "trends_data": self.trends_data,
+            "youtube_data": self.youtube_data,
+            "num_ideas": self.num_ideas,
+            "model": self.model
+        }
+
+    def _exact_slots(self):
+        """Slots a semantic cache hit must match verbatim, since they barely move the embedding"""
+        return {"model": self.model, "num_ideas": self.num_ideas}
+
+    def _is_complete(self, cached):
+        return cached is not None and len(cached.get("content_ideas", [])) == self.num_ideas
+
+    async def _plan(self, slots):
+        """
+        Returns (model, prompt, skeleton): a cheap patch of a stored skeleton for
+        structurally similar inputs, otherwise a full generation
+        """
+        prompt = _prompts.get_template(PROMPT_TEMPLATE).render(
+            trends_data=json.dumps(self.trends_data, indent=2),
+            youtube_data=json.dumps(self.youtube_data, indent=2),
+            num_ideas=self.num_ideas
+        )
+        
+        skeleton = await asyncio.to_thread(_template_cache().get, slots)
+        if skeleton is not None:
+            patch_prompt = PATCH_PROMPT.format(skeleton=json.dumps(skeleton, indent=2), prompt=prompt)
+            return PATCH_MODEL, patch_prompt, skeleton
+        return self.model, prompt, None
+
+    async def _remember(self, slots, canonical, ideas, skeleton):
+        """Stores generated ideas in the semantic cache and, for full generations, as a skeleton"""
+        await asyncio.to_thread(_semantic_cache().put, canonical, ideas, self._exact_slots())
+        if skeleton is None:
+            await asyncio.to_thread(_template_cache().put, slots, ideas)
+
+    async def _complete(self, client, model, prompt, stream=False):
+        """
+        Runs a cached chat completion, backing off on rate limits. With
+        stream=True the uncached response stream is returned instead.
+        """
+        request = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
+            "temperature": 0,  # deterministic, so repeated prompts hit the cache
+            "response_format": {"type": "json_object"}
+        }
+        
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type(openai.RateLimitError),
+            wait=wait_random_exponential(min=1, max=60),
+            stop=stop_after_attempt(6),
+            reraise=True
+        ):
+            with attempt:
+                if stream:
+                    return await client.chat.completions.create(**request, stream=True)
+                response = await acached_chat_completion(client, **request)
         
         return response.choices[0].message.content
 
+    @classmethod
+    async def run_many(cls, tools: List["ContentGenerator"]):
+        """
+        Runs several generators concurrently and returns their outputs in order
+        """
+        # Holding the loop's client here keeps one client open across all the runs
+        async with _async_client():
+            return await asyncio.gather(*(tool.arun() for tool in tools))
+
 if __name__ == "__main__":
     test_trends = {
         "trending_topics": ["AI Ethics", "Machine Learning"],
@@ -90,4 +304,4 @@ if __name__ == "__main__":
         youtube_data=test_youtube,
         num_ideas=3
     )
-    print(tool.run()) 
\ No newline at end of file
+    print(tool.run())
@@ -1,19 +1,119 @@
 from agency_swarm.tools import BaseTool
-from pydantic import Field
+from pydantic import BaseModel, Field, ValidationError
 import os
 from dotenv import load_dotenv
 from googleapiclient.discovery import build
 import openai
-from typing import Dict, List
+import httpx
+from typing import Dict, List, Optional
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import json
-from textblob import TextBlob
+import time
+import tempfile
+from functools import lru_cache
+import textstat
 import re
-from collections import Counter
+from content_creation_agency.common.llm_cache import cached_chat_completion
 
 load_dotenv()
 
+OPTIMIZATION_MODEL = "gpt-4-0125-preview"
+BATCH_POLL_INTERVAL = 30  # seconds between Batch API status checks
+
+_WORD_RE = re.compile(r'\w+')
+
+OPTIMIZED_FIELDS = ("title", "description", "tags", "script")
+
+SYSTEM_PROMPT = """You are an expert content strategist who optimizes video content for search
+visibility and audience engagement. Base every change on the provided SEO analysis and
+competitor data, keep the creator's voice, and always respond with a JSON object."""
+
+class EngagementPrediction(BaseModel):
+    predicted_engagement_rate: float
+    predicted_views: str
+    confidence: str
+    reasoning: str
+
+class OptimizationBundle(BaseModel):
+    """All optimizations for one piece of content, returned by a single completion"""
+    title: Optional[str] = None
+    description: Optional[str] = None
+    tags: Optional[List[str]] = None
+    script: Optional[str] = None
+    engagement_prediction: EngagementPrediction
+
+# One client per process, so runs reuse pooled TLS connections
+@lru_cache(maxsize=1)
+def _client():
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=20, max_connections=40))
+    )
+
+def _read_batch_file(client, file_id):
+    """Parses a Batch API output or error file; a missing file has no records"""
+    if not file_id:
+        return []
+    return [json.loads(line) for line in client.files.content(file_id).text.splitlines() if line.strip()]
+
+def _batch_error(record):
+    """Error message of a failed Batch API record"""
+    if record.get("error"):
+        return record["error"].get("message") or str(record["error"])
+    response = record.get("response") or {}
+    error = (response.get("body") or {}).get("error") or {}
+    return error.get("message") or f"Request failed with status {response.get('status_code')}"
+
+def _run_batch_job(client, requests):
+    """
+    Submits chat completion requests through the Batch API and waits for the
+    batch to finish. Returns (outputs, errors), each keyed by custom_id: the
+    message content of every successful request and an error message for
+    every request that failed or got no result.
+    """
+    if not requests:
+        return {}, {}
+    
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+        path = f.name
+    try:
+        with open(path, "rb") as f:
+            batch_file = client.files.create(file=f, purpose="batch")
+    finally:
+        os.remove(path)
+    
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(BATCH_POLL_INTERVAL)
+        batch = client.batches.retrieve(batch.id)
+    
+    # A failed batch was rejected as a whole; expired and cancelled ones keep partial results
+    if batch.status == "failed":
+        raise RuntimeError(f"Batch {batch.id} failed: {batch.errors}")
+    
+    outputs, errors = {}, {}
+    records = _read_batch_file(client, batch.output_file_id) + _read_batch_file(client, batch.error_file_id)
+    for record in records:
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            outputs[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        else:
+            errors[record["custom_id"]] = _batch_error(record)
+    
+    for request in requests:
+        custom_id = request["custom_id"]
+        if custom_id not in outputs and custom_id not in errors:
+            errors[custom_id] = f"No result returned (batch {batch.status})"
+    return outputs, errors
+
 class ContentOptimizer(BaseTool):
     """
     Optimizes content for SEO, engagement, and platform-specific best practices
@@ -34,12 +134,17 @@ class ContentOptimizer(BaseTool):
         default={},
         description="Optional historical performance data"
     )
+    use_batch_api: bool = Field(
+        default=False,
+        description="Whether to run the LLM calls through the Batch API (half the cost, up to 24h latency)"
+    )
 
     def run(self):
         """
         Optimizes content using multiple optimization strategies
         """
-        client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        if self.use_batch_api:
+            return self.run_batch([self])[0]
         
         results = {
             "optimized_content": {},
@@ -53,46 +158,52 @@ class ContentOptimizer(BaseTool):
         seo_results = self._optimize_seo(self.content)
         results["seo_analysis"] = seo_results
         
-        # 2. Title Optimization
-        if "title" in self.content:
-            optimized_title = self._optimize_title(
-                self.content["title"],
-                seo_results,
-                self.competitor_data
-            )
-            results["optimized_content"]["title"] = optimized_title
-        
-        # 3. Description Optimization
-        if "description" in self.content:
-            optimized_description = self._optimize_description(
-                self.content["description"],
-                seo_results
-            )
-            results["optimized_content"]["description"] = optimized_description
+        # 2-6. Title, description, tag and script optimization plus engagement
+        # prediction, folded into a single LLM request
+        try:
+            self._apply_bundle(results, self._optimize_bundle(seo_results))
+        except ValidationError as e:
+            results["error"] = f"Malformed optimization response: {e}"
         
-        # 4. Tag Optimization
-        if "tags" in self.content:
-            optimized_tags = self._optimize_tags(
-                self.content["tags"],
-                seo_results,
-                self.competitor_data
-            )
-            results["optimized_content"]["tags"] = optimized_tags
+        return self._finalize(results)
+    
+    @classmethod
+    def run_batch(cls, items: List["ContentOptimizer"]):
+        """
+        Optimizes several content items with their LLM requests grouped into
+        one Batch API job. Returns one result per item, in order.
+        """
+        all_results = []
+        requests = []
+        for index, item in enumerate(items):
+            seo_results = item._optimize_seo(item.content)
+            all_results.append({
+                "optimized_content": {},
+                "seo_analysis": seo_results,
+                "engagement_predictions": {},
+                "recommendations": {},
+                "metadata": {}
+            })
+            request = item._optimize_bundle(seo_results, defer=True)
+            request["custom_id"] = str(index)
+            requests.append(request)
         
-        # 5. Script Optimization
-        if "script" in self.content:
-            optimized_script = self._optimize_script(
-                self.content["script"],
-                self.platform
-            )
-            results["optimized_content"]["script"] = optimized_script
-        
-        # 6. Engagement Prediction
-        results["engagement_predictions"] = self._predict_engagement(
-            results["optimized_content"],
-            self.performance_data
-        )
+        outputs, errors = _run_batch_job(_client(), requests)
+        for custom_id, content in outputs.items():
+            index = int(custom_id)
+            try:
+                bundle = cls._parse_bundle(content)
+            except ValidationError as e:
+                all_results[index]["error"] = f"Malformed optimization response: {e}"
+                continue
+            items[index]._apply_bundle(all_results[index], bundle)
+        for custom_id, error in errors.items():
+            all_results[int(custom_id)]["error"] = error
         
+        return [item._finalize(results) for item, results in zip(items, all_results)]
+    
+    def _finalize(self, results):
+        """Adds recommendations and metadata to the optimization results"""
         # 7. Generate Recommendations
         results["recommendations"] = self._generate_recommendations(
             results["seo_analysis"],
@@ -125,18 +236,23 @@ class ContentOptimizer(BaseTool):
         ])
         
         # Calculate keyword density
-        words = re.findall(r'\w+', all_text.lower())
-        word_freq = Counter(words)
-        total_words = len(words)
+        words = _WORD_RE.findall(all_text.lower())
         
-        seo_analysis["keyword_density"] = {
-            word: count/total_words * 100
-            for word, count in word_freq.most_common(10)
-        }
+        if words:
+            unique_words, counts = np.unique(np.array(words), return_counts=True)
+            if counts.size > 10:
+                top = np.argpartition(counts, -10)[-10:]
+            else:
+                top = np.arange(counts.size)
+            top = top[np.argsort(-counts[top], kind="stable")]
+            
+            densities = counts[top] / len(words) * 100
+            seo_analysis["keyword_density"] = dict(
+                zip(unique_words[top].tolist(), densities.tolist())
+            )
         
         # Calculate readability
-        blob = TextBlob(all_text)
-        seo_analysis["readability_score"] = self._calculate_readability(blob)
+        seo_analysis["readability_score"] = self._calculate_readability(all_text)
         
         # Calculate SEO score and identify improvements
         seo_score = 0
@@ -184,67 +300,84 @@ class ContentOptimizer(BaseTool):
         
         return seo_analysis
     
-    def _optimize_title(self, title, seo_results, competitor_data):
-        """Optimizes title based on SEO and competitor analysis"""
-        # Implementation details...
-        return title
-    
-    def _optimize_description(self, description, seo_results):
-        """Optimizes description for better engagement and SEO"""
-        # Implementation details...
-        return description
-    
-    def _optimize_tags(self, tags, seo_results, competitor_data):
-        """Optimizes tags based on SEO and competitor analysis"""
-        # Implementation details...
-        return tags
+    def _optimize_bundle(self, seo_results, defer=False):
+        """
+        Optimizes every field present in the content and predicts engagement in
+        one chat completion, or with defer=True returns that completion as a
+        Batch API request line to be submitted later
+        """
+        fields = [field for field in OPTIMIZED_FIELDS if field in self.content]
+        prompt = f"""Optimize this {self.platform} content for search ranking, click-through and
+        engagement, then predict how the optimized version will perform relative to the
+        creator's historical performance.
+
+        - title: 30 to 60 characters
+        - description: front-load the main keywords, 100 to 5000 characters, end with a call to action
+        - tags: 5 to 15 tags mixing broad and long-tail keywords, keep the relevant existing ones
+        - script: strengthen the opening hook, tighten pacing, keep the original structure and facts
+
+        Only optimize these fields and leave the others null: {fields}
+
+        Content: {json.dumps({field: self.content[field] for field in fields})}
+        Top keywords: {list(seo_results["keyword_density"])}
+        SEO issues: {seo_results["improvement_areas"]}
+        Competitor data: {json.dumps(self.competitor_data)}
+        Historical performance: {json.dumps(self.performance_data)}
+        
+        Respond with a JSON object matching this schema:
+        {json.dumps(OptimizationBundle.model_json_schema())}"""
+        
+        body = {
+            "model": OPTIMIZATION_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0,
+            # JSON mode only guarantees valid JSON; _parse_bundle enforces the schema
+            "response_format": {"type": "json_object"}
+        }
+        if defer:
+            return {
+                "custom_id": "bundle",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }
+        
+        response = cached_chat_completion(
+            _client(),
+            validate=lambda r: self._parse_bundle(r.choices[0].message.content),
+            **body
+        )
+        return self._parse_bundle(response.choices[0].message.content)
     
-    def _optimize_script(self, script, platform):
-        """Optimizes script for the target platform"""
-        # Implementation details...
-        return script
+    @staticmethod
+    def _parse_bundle(content):
+        """Validates a completion against the OptimizationBundle schema"""
+        return OptimizationBundle.model_validate_json(content).model_dump()
     
-    def _predict_engagement(self, optimized_content, performance_data):
-        """Predicts engagement metrics for the optimized content"""
-        # Implementation details...
-        return {}
+    def _apply_bundle(self, results, bundle):
+        """Splits an optimization bundle into the result sections"""
+        results["optimized_content"] = {
+            field: bundle[field]
+            for field in OPTIMIZED_FIELDS
+            if field in self.content and bundle[field] is not None
+        }
+        results["engagement_predictions"] = bundle["engagement_prediction"]
     
     def _generate_recommendations(self, seo_analysis, engagement_predictions):
         """Generates actionable recommendations for content improvement"""
         # Implementation details...
         return {}
     
-    def _calculate_readability(self, blob):
-        """Calculates readability score using TextBlob"""
-        sentences = len(blob.sentences)
-        words = len(blob.words)
-        syllables = sum(self._count_syllables(word) for word in blob.words)
-        
-        if sentences == 0 or words == 0:
+    def _calculate_readability(self, text):
+        """Calculates the Flesch Reading Ease score using textstat"""
+        if not text.strip():
             return 0
         
-        # Calculate Flesch Reading Ease score
-        score = 206.835 - 1.015 * (words / sentences) - 84.6 * (syllables / words)
+        score = textstat.flesch_reading_ease(text)
         return min(max(score, 0), 100)  # Clamp between 0 and 100
-    
-    def _count_syllables(self, word):
-        """Counts syllables in a word"""
-        word = word.lower()
-        count = 0
-        vowels = "aeiouy"
-        prev_char_is_vowel = False
-        
-        for char in word:
-            is_vowel = char in vowels
-            if is_vowel and not prev_char_is_vowel:
-                count += 1
-            prev_char_is_vowel = is_vowel
-        
-        if word.endswith("e"):
-            count -= 1
-        if count == 0:
-            count = 1
-        return count
 
 if __name__ == "__main__":
     test_content = {
@@ -1,7 +1,91 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
+import sys
+import inspect
 from datetime import datetime
+from typing import List
+
+try:
+    import liburing
+except ImportError:  # io_uring is Linux-only; batches fall back to regular writes
+    liburing = None
+
+SCRIPTS_DIR = "scripts"
+URING_QUEUE_DEPTH = 64
+
+_TITLE_TO_FILENAME = str.maketrans(" ", "_")
+_scripts_dir_ready = False
+
+def _ensure_scripts_dir():
+    """Creates the scripts directory once per process"""
+    global _scripts_dir_ready
+    if not _scripts_dir_ready:
+        os.makedirs(SCRIPTS_DIR, exist_ok=True)
+        _scripts_dir_ready = True
+
+def _prep_write(sqe, fd, data):
+    """
+    Queues a full write of data at offset 0. Older liburing releases mirror the
+    C API (sqe, fd, buf, nbytes, offset); newer ones take (sqe, fd, buf, offset)
+    and derive the length from the buffer.
+    """
+    if _PREP_WRITE_TAKES_NBYTES:
+        liburing.io_uring_prep_write(sqe, fd, data, len(data), 0)
+    else:
+        liburing.io_uring_prep_write(sqe, fd, data, 0)
+
+def _prep_write_takes_nbytes():
+    try:
+        return "nbytes" in inspect.signature(liburing.io_uring_prep_write).parameters
+    except (TypeError, ValueError):
+        return True
+
+_PREP_WRITE_TAKES_NBYTES = liburing is not None and _prep_write_takes_nbytes()
+
+def _write_files(paths, payloads):
+    """
+    Writes each payload to its path. On Linux with liburing available, the
+    writes are queued on an io_uring and submitted with one syscall per
+    URING_QUEUE_DEPTH files instead of one per file.
+    """
+    if liburing is None or sys.platform != "linux":
+        for path, data in zip(paths, payloads):
+            with open(path, "wb") as f:
+                f.write(data)
+        return
+    
+    fds = []
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    liburing.io_uring_queue_init(URING_QUEUE_DEPTH, ring)
+    try:
+        for path in paths:
+            fds.append(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644))
+        
+        for start in range(0, len(fds), URING_QUEUE_DEPTH):
+            chunk = range(start, min(start + URING_QUEUE_DEPTH, len(fds)))
+            for index in chunk:
+                sqe = liburing.io_uring_get_sqe(ring)
+                _prep_write(sqe, fds[index], payloads[index])
+                liburing.io_uring_sqe_set_data64(sqe, index)
+            liburing.io_uring_submit(ring)
+            
+            for _ in chunk:
+                liburing.io_uring_wait_cqe(ring, cqe)
+                entry = cqe[0]
+                index = entry.user_data
+                written = liburing.trap_error(entry.res)
+                liburing.io_uring_cqe_seen(ring, entry)
+                
+                # Short writes are rare on regular files; finish them synchronously
+                data = payloads[index]
+                while written < len(data):
+                    written += os.pwrite(fds[index], data[written:], written)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+        for fd in fds:
+            os.close(fd)
 
 class ScriptEditor(BaseTool):
     """
@@ -15,23 +99,47 @@ class ScriptEditor(BaseTool):
         Saves the script to a local file and returns the file path
         """
         # Create scripts directory if it doesn't exist
-        scripts_dir = "scripts"
-        if not os.path.exists(scripts_dir):
-            os.makedirs(scripts_dir)
+        _ensure_scripts_dir()
             
         # Create filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{scripts_dir}/{timestamp}_{self.title.replace(' ', '_')}.md"
+        filename = self._filename(datetime.now().strftime("%Y%m%d_%H%M%S"))
         
-        # Write content to file
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(self.content)
+        # Write pre-encoded content to file
+        data = self.content.encode("utf-8")
+        with open(filename, "wb") as f:
+            f.write(data)
             
         return f"Script saved to {filename}"
+    
+    @classmethod
+    def run_batch(cls, items: List["ScriptEditor"]):
+        """
+        Saves several scripts in one batched write and returns a status per script
+        """
+        _ensure_scripts_dir()
+        
+        # Items share a timestamp, so repeated titles get a numeric suffix to keep paths unique
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filenames = []
+        used = set()
+        for item in items:
+            filename = item._filename(timestamp)
+            count = 0
+            while filename in used:
+                count += 1
+                filename = item._filename(timestamp, suffix=f"_{count}")
+            used.add(filename)
+            filenames.append(filename)
+        _write_files(filenames, [item.content.encode("utf-8") for item in items])
+        
+        return [f"Script saved to {filename}" for filename in filenames]
+    
+    def _filename(self, timestamp, suffix=""):
+        return f"{SCRIPTS_DIR}/{timestamp}_{self.title.translate(_TITLE_TO_FILENAME)}{suffix}.md"
 
 if __name__ == "__main__":
     tool = ScriptEditor(
         title="Test Script",
         content="# Test Script\n\nThis is a test script."
     )
-    print(tool.run()) 
\ No newline at end of file
+    print(tool.run())
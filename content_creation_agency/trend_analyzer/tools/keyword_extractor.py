@@ -1,19 +1,24 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.tag import pos_tag
-from nltk.chunk import ne_chunk
 from collections import Counter
+from functools import lru_cache
 from textblob import TextBlob
 import spacy
 from keybert import KeyBERT
 
+# Models are loaded on first use and shared across runs
+@lru_cache(maxsize=1)
+def _spacy():
+    return spacy.load('en_core_web_sm')
+
+@lru_cache(maxsize=1)
+def _kw_model():
+    return KeyBERT()
+
 class KeywordExtractor(BaseTool):
     """
-    Advanced keyword extraction tool using multiple NLP techniques including NLTK, 
-    spaCy, and KeyBERT for comprehensive text analysis
+    Advanced keyword extraction tool using multiple NLP techniques including spaCy
+    and KeyBERT for comprehensive text analysis
     """
     text: str = Field(..., description="The text to extract keywords from")
     min_keyword_length: int = Field(
@@ -29,13 +34,8 @@ class KeywordExtractor(BaseTool):
         """
         Extracts and analyzes keywords using multiple NLP techniques
         """
-        # Download required NLTK data
-        for package in ['punkt', 'averaged_perceptron_tagger', 'stopwords', 'maxent_ne_chunker', 'words']:
-            nltk.download(package, quiet=True)
-        
         # Initialize NLP tools
-        nlp = spacy.load('en_core_web_sm')
-        kw_model = KeyBERT()
+        kw_model = _kw_model()
         
         # Process with multiple techniques
         results = {
@@ -46,29 +46,17 @@ class KeywordExtractor(BaseTool):
             "topic_keywords": []
         }
         
-        # 1. Basic NLTK processing
-        tokens = word_tokenize(self.text.lower())
-        stop_words = set(stopwords.words('english'))
-        tokens = [t for t in tokens if t.isalnum() and 
-                 t not in stop_words and 
+        # 1. Single spaCy pass for tokens, POS tags, entities and noun chunks
+        doc = _spacy()(self.text)
+        tokens = [t for t in doc if not t.is_stop and t.is_alpha and 
                  len(t) >= self.min_keyword_length]
+        nouns = [t.lemma_.lower() for t in tokens if t.pos_ in ('NOUN', 'PROPN')]
         
-        # POS tagging and noun extraction
-        tagged = pos_tag(tokens)
-        nouns = [word for word, pos in tagged if pos.startswith('NN')]
-        
-        # 2. Named Entity Recognition with NLTK
-        sentences = sent_tokenize(self.text)
-        for sentence in sentences:
-            tokens = nltk.word_tokenize(sentence)
-            tagged = nltk.pos_tag(tokens)
-            entities = ne_chunk(tagged)
-            for entity in entities:
-                if hasattr(entity, 'label'):
-                    results["named_entities"].append({
-                        'text': ' '.join([child[0] for child in entity]),
-                        'type': entity.label()
-                    })
+        # 2. Named Entity Recognition
+        results["named_entities"] = [
+            {'text': ent.text, 'type': ent.label_}
+            for ent in doc.ents
+        ]
         
         # 3. Keyword extraction with KeyBERT
         keywords = kw_model.extract_keywords(
@@ -80,12 +68,10 @@ class KeywordExtractor(BaseTool):
             top_n=self.max_keywords
         )
         
-        # 4. spaCy processing for additional insights
-        doc = nlp(self.text)
-        
-        # Extract key phrases using noun chunks
-        key_phrases = [chunk.text for chunk in doc.noun_chunks]
-        results["key_phrases"] = Counter(key_phrases).most_common(self.max_keywords)
+        # 4. Extract key phrases using noun chunks
+        results["key_phrases"] = Counter(
+            chunk.text for chunk in doc.noun_chunks
+        ).most_common(self.max_keywords)
         
         # 5. Sentiment Analysis with TextBlob
         blob = TextBlob(self.text)
@@ -1,10 +1,28 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
 from pytrends.request import TrendReq
+from pytrends.exceptions import TooManyRequestsError
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
 from scipy import stats
+import asyncio
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from content_creation_agency.common.event_loop import run_sync
+
+# Batches fetched concurrently; Google Trends rate-limits larger bursts
+MAX_CONCURRENT_BATCHES = 4
+
+async def _fetch(fn, *args, **kwargs):
+    """Runs a blocking pytrends call in a thread, backing off when Google Trends answers 429"""
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception_type(TooManyRequestsError),
+        wait=wait_random_exponential(min=2, max=60),
+        stop=stop_after_attempt(5),
+        reraise=True
+    ):
+        with attempt:
+            return await asyncio.to_thread(fn, *args, **kwargs)
 
 class TrendAnalyzer(BaseTool):
     """
@@ -25,8 +43,12 @@ class TrendAnalyzer(BaseTool):
         """
         Analyzes trends using pytrends with advanced analytics
         """
-        pytrends = TrendReq(hl='en-US', tz=360)
-        
+        return run_sync(self.arun())
+    
+    async def arun(self):
+        """
+        Async variant of run that fetches all keyword batches concurrently
+        """
         # Initialize results dictionary
         results = {
             "trend_data": {},
@@ -38,19 +60,22 @@ class TrendAnalyzer(BaseTool):
         }
         
         # Analyze keywords in batches of 5 (Google Trends limit)
-        for i in range(0, len(self.keywords), 5):
-            batch_keywords = self.keywords[i:i+5]
-            
-            # Build payload
-            pytrends.build_payload(
-                batch_keywords,
-                cat=0,
-                timeframe=self.timeframe,
-                geo=self.geo
-            )
+        batches = [self.keywords[i:i+5] for i in range(0, len(self.keywords), 5)]
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+        # A batch that still fails after backing off is reported without discarding the others
+        batch_results = await asyncio.gather(
+            *(self._analyze_batch(batch_keywords, semaphore) for batch_keywords in batches),
+            return_exceptions=True
+        )
+        
+        for batch_keywords, batch_data in zip(batches, batch_results):
+            if isinstance(batch_data, Exception):
+                results["errors"] = results.get("errors", {})
+                for keyword in batch_keywords:
+                    results["errors"][keyword] = str(batch_data) or type(batch_data).__name__
+                continue
             
-            # Get interest over time
-            interest_df = pytrends.interest_over_time()
+            interest_df, related_topics, related_queries, regional_interest = batch_data
             
             if not interest_df.empty:
                 # Store raw trend data
@@ -58,25 +83,28 @@ class TrendAnalyzer(BaseTool):
                     if keyword in interest_df.columns:
                         results["trend_data"][keyword] = interest_df[keyword].tolist()
                         
-                        # Perform statistical analysis
-                        trend_values = interest_df[keyword].values
+                        # Perform statistical analysis with a single regression fit
+                        trend_values = interest_df[keyword].to_numpy(dtype=np.float64, copy=False)
+                        x = np.arange(trend_values.size)
+                        slope, intercept, r_value, _, _ = stats.linregress(x, trend_values)
+                        mean = trend_values.mean()
+                        std = trend_values.std()
+                        
                         results["trend_analysis"][keyword] = {
-                            "mean": float(np.mean(trend_values)),
+                            "mean": float(mean),
                             "median": float(np.median(trend_values)),
-                            "std": float(np.std(trend_values)),
-                            "min": float(np.min(trend_values)),
-                            "max": float(np.max(trend_values)),
-                            "trend_direction": self._calculate_trend_direction(trend_values),
-                            "volatility": float(np.std(trend_values) / np.mean(trend_values)),
+                            "std": float(std),
+                            "min": float(trend_values.min()),
+                            "max": float(trend_values.max()),
+                            "trend_direction": self._calculate_trend_direction(slope, r_value),
+                            "volatility": float(std / mean),
                             "momentum": self._calculate_momentum(trend_values)
                         }
                         
                         # Simple prediction for next 30 days
-                        results["predictions"][keyword] = self._predict_trend(trend_values)
-            
-            # Get related topics and queries
-            related_topics = pytrends.related_topics()
-            related_queries = pytrends.related_queries()
+                        results["predictions"][keyword] = self._predict_trend(
+                            slope, intercept, trend_values.size
+                        )
             
             for keyword in batch_keywords:
                 if keyword in related_topics:
@@ -91,18 +119,45 @@ class TrendAnalyzer(BaseTool):
                         "top": related_queries[keyword]['top'].to_dict() if related_queries[keyword]['top'] is not None else {}
                     }
             
-            # Get regional interest if geo is specified
-            if self.geo:
-                regional_interest = pytrends.interest_by_region(resolution='COUNTRY')
+            # Regional interest is only fetched if geo is specified
+            if regional_interest is not None:
                 results["regional_interest"].update(regional_interest.to_dict())
         
         return results
     
-    def _calculate_trend_direction(self, values):
-        """Calculate the overall trend direction using linear regression"""
-        x = np.arange(len(values))
-        slope, _, r_value, _, _ = stats.linregress(x, values)
-        
+    async def _analyze_batch(self, batch_keywords, semaphore):
+        """
+        Fetches interest over time, related topics/queries and regional interest
+        for one batch. Each batch gets its own TrendReq since the payload is
+        stored on the instance; the independent endpoints are fetched concurrently.
+        """
+        async with semaphore:
+            pytrends = await _fetch(TrendReq, hl='en-US', tz=360)
+            
+            # Build payload
+            await _fetch(
+                pytrends.build_payload,
+                batch_keywords,
+                cat=0,
+                timeframe=self.timeframe,
+                geo=self.geo
+            )
+            
+            requests = [
+                _fetch(pytrends.interest_over_time),
+                _fetch(pytrends.related_topics),
+                _fetch(pytrends.related_queries)
+            ]
+            if self.geo:
+                requests.append(_fetch(pytrends.interest_by_region, resolution='COUNTRY'))
+            
+            batch_data = await asyncio.gather(*requests)
+            if not self.geo:
+                batch_data.append(None)
+            return batch_data
+    
+    def _calculate_trend_direction(self, slope, r_value):
+        """Calculate the overall trend direction from the linear regression fit"""
         if abs(r_value) < 0.3:
             return "stable"
         return "increasing" if slope > 0 else "decreasing"
@@ -113,12 +168,9 @@ class TrendAnalyzer(BaseTool):
             return 0
         return float(((values[-1] - values[0]) / values[0]) * 100)
     
-    def _predict_trend(self, values):
+    def _predict_trend(self, slope, intercept, n_values):
         """Simple linear prediction for next 30 days"""
-        x = np.arange(len(values))
-        slope, intercept, _, _, _ = stats.linregress(x, values)
-        
-        future_x = np.arange(len(values), len(values) + 30)
+        future_x = np.arange(n_values, n_values + 30)
         predictions = slope * future_x + intercept
         
         return predictions.tolist()
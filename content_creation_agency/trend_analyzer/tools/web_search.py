@@ -3,10 +3,40 @@ from pydantic import Field
 import os
 from dotenv import load_dotenv
 from tavily import TavilyClient
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+import diskcache
 
 load_dotenv()
 
+_STOP_WORDS = frozenset(("the", "and", "for", "with"))
+
+_cache = diskcache.Cache(os.path.expanduser("~/.cache/cca_web"))
+
+@_cache.memoize(expire=24 * 60 * 60)
+def _tavily_search(query, days_back, include_sentiment, date_str):
+    """
+    Runs the Tavily search. Results are cached for 24h and keyed on the
+    current date, so the cache also rolls over daily.
+    """
+    client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    
+    # Search with time filtering
+    date_filter = (date.fromisoformat(date_str) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    
+    return client.search(
+        query=query,
+        search_depth="advanced",
+        include_answer=True,
+        include_domains=["arxiv.org", "github.com", "paperswithcode.com", "huggingface.co"],
+        exclude_domains=["wikipedia.org"],
+        max_results=20,
+        topic="technology",
+        search_params={
+            "date_published_after": date_filter,
+            "include_sentiment": include_sentiment
+        }
+    )
+
 class WebSearch(BaseTool):
     """
     Advanced web search tool for AI trends using Tavily API with filtering and trend detection
@@ -25,55 +55,40 @@ class WebSearch(BaseTool):
         """
         Performs an advanced web search with trend detection and filtering
         """
-        client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-        
-        # Search with time filtering
-        date_filter = (datetime.now() - timedelta(days=self.days_back)).strftime("%Y-%m-%d")
-        
-        response = client.search(
-            query=self.query,
-            search_depth="advanced",
-            include_answer=True,
-            include_domains=["arxiv.org", "github.com", "paperswithcode.com", "huggingface.co"],
-            exclude_domains=["wikipedia.org"],
-            max_results=20,
-            topic="technology",
-            search_params={
-                "date_published_after": date_filter,
-                "include_sentiment": self.include_sentiment
-            }
+        response = _tavily_search(
+            self.query,
+            self.days_back,
+            self.include_sentiment,
+            date.today().isoformat()
         )
         
         # Process and structure results
+        results = response.get("results", [])
+        titles = [result["title"] for result in results if result.get("title")]
+        
         structured_results = {
             "summary": response.get("answer", ""),
-            "top_sources": [],
-            "trending_topics": set(),
-            "key_findings": []
-        }
-        
-        for result in response.get("results", []):
-            # Add to top sources
-            structured_results["top_sources"].append({
-                "title": result.get("title"),
-                "url": result.get("url"),
-                "published_date": result.get("published_date"),
-                "relevance_score": result.get("relevance_score"),
-                "sentiment": result.get("sentiment") if self.include_sentiment else None
-            })
-            
+            "top_sources": [
+                {
+                    "title": result.get("title"),
+                    "url": result.get("url"),
+                    "published_date": result.get("published_date"),
+                    "relevance_score": result.get("relevance_score"),
+                    "sentiment": result.get("sentiment") if self.include_sentiment else None
+                }
+                for result in results
+            ],
             # Extract potential trending topics from titles
-            if "title" in result:
-                topics = [topic.strip() for topic in result["title"].split() 
-                         if len(topic) > 3 and topic.lower() not in {"the", "and", "for", "with"}]
-                structured_results["trending_topics"].update(topics)
-            
+            "trending_topics": list({
+                word for title in titles for word in title.split()
+                if len(word) > 3 and word.lower() not in _STOP_WORDS
+            }),
             # Add key findings
-            if result.get("relevance_score", 0) > 0.7:
-                structured_results["key_findings"].append(result.get("snippet"))
-        
-        # Convert trending_topics set to list
-        structured_results["trending_topics"] = list(structured_results["trending_topics"])
+            "key_findings": [
+                result.get("snippet") for result in results
+                if result.get("relevance_score", 0) > 0.7
+            ]
+        }
         
         return structured_results
 
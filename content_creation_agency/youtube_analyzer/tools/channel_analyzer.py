@@ -1,10 +1,9 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import os
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from datetime import datetime, timedelta
 import pandas as pd
+import numpy as np
+from content_creation_agency.common.youtube_api import DATE_FORMAT, youtube_service, execute, execute_all, count_array
 
 load_dotenv()
 
@@ -28,70 +27,80 @@ class ChannelAnalyzer(BaseTool):
         """
         Analyzes channel performance using YouTube Data API with enhanced metrics
         """
-        youtube = build('youtube', 'v3', 
-                       developerKey=os.getenv('YOUTUBE_API_KEY'))
+        youtube = youtube_service()
+        now = pd.Timestamp.now(tz='UTC')
         
         # Get channel statistics and details
-        channel_response = youtube.channels().list(
+        channel_response = execute(youtube.channels().list(
             part='statistics,snippet,brandingSettings,contentDetails',
             id=CHANNEL_ID
-        ).execute()
+        ))
         
-        # Get recent videos
-        date_threshold = (datetime.now() - timedelta(days=self.days_back)).isoformat() + 'Z'
+        # Get recent videos (threshold truncated to the hour so the search stays cacheable)
+        date_threshold = (now - pd.Timedelta(days=self.days_back)).floor('h').strftime(DATE_FORMAT)
         
-        videos_response = youtube.search().list(
+        videos_response = execute(youtube.search().list(
             part='id,snippet',
             channelId=CHANNEL_ID,
             order='date',
             type='video',
             publishedAfter=date_threshold,
             maxResults=50
-        ).execute()
+        ))
 
-        # Get detailed video statistics
-        video_stats = []
-        for video in videos_response.get('items', []):
-            video_id = video['id']['videoId']
-            stats = youtube.videos().list(
+        # Get detailed video statistics in a single call (videos.list takes up to 50 ids)
+        videos = videos_response.get('items', [])
+        video_ids = [video['id']['videoId'] for video in videos]
+        stats_by_id = {}
+        if video_ids:
+            stats_response = execute(youtube.videos().list(
                 part='statistics,contentDetails',
-                id=video_id
-            ).execute()
-            
-            if stats['items']:
-                video_stats.append({
-                    'title': video['snippet']['title'],
-                    'published_at': video['snippet']['publishedAt'],
-                    'video_id': video_id,
-                    'views': int(stats['items'][0]['statistics'].get('viewCount', 0)),
-                    'likes': int(stats['items'][0]['statistics'].get('likeCount', 0)),
-                    'comments': int(stats['items'][0]['statistics'].get('commentCount', 0)),
-                    'duration': stats['items'][0]['contentDetails']['duration']
-                })
+                id=','.join(video_ids)
+            ))
+            stats_by_id = {item['id']: item for item in stats_response.get('items', [])}
 
-                # Add comment analysis if requested
-                if self.include_comments:
-                    comments = youtube.commentThreads().list(
-                        part='snippet',
-                        videoId=video_id,
-                        maxResults=100,
-                        order='relevance'
-                    ).execute()
-                    
-                    video_stats[-1]['top_comments'] = [
-                        {
-                            'text': comment['snippet']['topLevelComment']['snippet']['textDisplay'],
-                            'likes': comment['snippet']['topLevelComment']['snippet']['likeCount']
-                        }
-                        for comment in comments.get('items', [])[:5]
-                    ]
+        found = [(video, stats_by_id[video_id]) for video, video_id in zip(videos, video_ids)
+                 if video_id in stats_by_id]
+
+        # Build the frame column-wise rather than from per-video dicts
+        df = pd.DataFrame({
+            'title': [video['snippet']['title'] for video, _ in found],
+            'published_at': [video['snippet']['publishedAt'] for video, _ in found],
+            'video_id': [stats['id'] for _, stats in found],
+            'views': count_array([int(stats['statistics'].get('viewCount', 0)) for _, stats in found]),
+            'likes': count_array([int(stats['statistics'].get('likeCount', 0)) for _, stats in found]),
+            'comments': count_array([int(stats['statistics'].get('commentCount', 0)) for _, stats in found]),
+            'duration': [stats['contentDetails']['duration'] for _, stats in found]
+        })
+
+        # Add comment analysis if requested, fetching all videos' comments concurrently
+        if self.include_comments:
+            comment_responses = execute_all(
+                youtube.commentThreads().list(
+                    part='snippet',
+                    videoId=video_id,
+                    maxResults=100,
+                    order='relevance'
+                )
+                for video_id in df['video_id']
+            )
+            df['top_comments'] = [
+                [
+                    {
+                        'text': comment['snippet']['topLevelComment']['snippet']['textDisplay'],
+                        'likes': comment['snippet']['topLevelComment']['snippet']['likeCount']
+                    }
+                    for comment in comments.get('items', [])[:5]
+                ]
+                for comments in comment_responses
+            ]
 
         # Calculate engagement metrics
-        df = pd.DataFrame(video_stats)
         if not df.empty:
+            published = pd.to_datetime(df['published_at'], format=DATE_FORMAT, utc=True, cache=True)
             df['engagement_rate'] = ((df['likes'] + df['comments']) / df['views'] * 100).round(2)
-            df['avg_views_per_day'] = (df['views'] / 
-                ((datetime.now() - pd.to_datetime(df['published_at'])).dt.total_seconds() / 86400)).round(2)
+            # Whole days since publishing, counting videos under a day old as one day
+            df['avg_views_per_day'] = (df['views'] / np.maximum(1, (now - published).dt.days)).round(2)
 
         # Compile comprehensive results
         results = {
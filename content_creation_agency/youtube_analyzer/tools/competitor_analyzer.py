@@ -1,15 +1,19 @@
 from agency_swarm.tools import BaseTool
 from pydantic import Field
-import os
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
 import pandas as pd
-from datetime import datetime, timedelta
 import numpy as np
 from typing import List
+from collections import Counter
+from itertools import chain
+from content_creation_agency.common.youtube_api import DATE_FORMAT, youtube_service, execute, map_concurrent, count_array
 
 load_dotenv()
 
+DAY_OF_WEEK = pd.CategoricalDtype(
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+)
+
 class CompetitorAnalyzer(BaseTool):
     """
     Analyzes competitor YouTube channels and their content strategies
@@ -31,8 +35,7 @@ class CompetitorAnalyzer(BaseTool):
         """
         Performs comprehensive competitor analysis using YouTube Data API
         """
-        youtube = build('youtube', 'v3', 
-                       developerKey=os.getenv('YOUTUBE_API_KEY'))
+        youtube = youtube_service()
         
         results = {
             "channel_comparisons": {},
@@ -43,128 +46,146 @@ class CompetitorAnalyzer(BaseTool):
             "growth_metrics": {}
         }
         
-        for channel_id in self.competitor_channels:
-            try:
-                # Get channel details
-                channel_response = youtube.channels().list(
-                    part='statistics,snippet,brandingSettings,contentDetails',
-                    id=channel_id
-                ).execute()
-                
-                if not channel_response['items']:
-                    continue
-                
-                channel_data = channel_response['items'][0]
-                
-                # Get recent videos
-                date_threshold = (datetime.now() - timedelta(days=self.days_back)).isoformat() + 'Z'
-                
-                videos_response = youtube.search().list(
-                    part='id,snippet',
-                    channelId=channel_id,
-                    order='date',
-                    type='video',
-                    publishedAfter=date_threshold,
-                    maxResults=50
-                ).execute()
-                
-                # Analyze videos
-                video_data = []
-                for video in videos_response.get('items', []):
-                    video_id = video['id']['videoId']
-                    stats = youtube.videos().list(
-                        part='statistics,contentDetails,snippet',
-                        id=video_id
-                    ).execute()
-                    
-                    if stats['items']:
-                        video_stats = stats['items'][0]
-                        if int(video_stats['statistics'].get('viewCount', 0)) >= self.min_views:
-                            video_data.append({
-                                'title': video['snippet']['title'],
-                                'description': video['snippet']['description'],
-                                'published_at': video['snippet']['publishedAt'],
-                                'views': int(video_stats['statistics'].get('viewCount', 0)),
-                                'likes': int(video_stats['statistics'].get('likeCount', 0)),
-                                'comments': int(video_stats['statistics'].get('commentCount', 0)),
-                                'duration': video_stats['contentDetails']['duration'],
-                                'tags': video_stats['snippet'].get('tags', [])
-                            })
-                
-                # Convert to DataFrame for analysis
-                df = pd.DataFrame(video_data)
-                if not df.empty:
-                    df['published_at'] = pd.to_datetime(df['published_at'])
-                    df['engagement_rate'] = ((df['likes'] + df['comments']) / df['views'] * 100).round(2)
-                    
-                    # Analyze upload patterns
-                    df['day_of_week'] = df['published_at'].dt.day_name()
-                    df['hour_of_day'] = df['published_at'].dt.hour
-                    
-                    # Store results
-                    results["channel_comparisons"][channel_id] = {
-                        'name': channel_data['snippet']['title'],
-                        'subscribers': int(channel_data['statistics']['subscriberCount']),
-                        'total_views': int(channel_data['statistics']['viewCount']),
-                        'total_videos': int(channel_data['statistics']['videoCount']),
-                        'avg_views_per_video': int(df['views'].mean()),
-                        'avg_engagement_rate': float(df['engagement_rate'].mean())
-                    }
-                    
-                    results["content_analysis"][channel_id] = {
-                        'common_tags': self._analyze_tags(df),
-                        'title_patterns': self._analyze_titles(df),
-                        'description_patterns': self._analyze_descriptions(df)
-                    }
-                    
-                    results["top_performing_content"][channel_id] = df.nlargest(
-                        5, 'views'
-                    )[['title', 'views', 'engagement_rate']].to_dict('records')
-                    
-                    results["upload_patterns"][channel_id] = {
-                        'best_days': df.groupby('day_of_week')['views'].mean().nlargest(3).to_dict(),
-                        'best_hours': df.groupby('hour_of_day')['views'].mean().nlargest(3).to_dict(),
-                        'upload_frequency': f"{len(df) / (self.days_back / 30):.1f} videos per month"
-                    }
-                    
-                    results["engagement_metrics"][channel_id] = {
-                        'avg_likes_per_view': (df['likes'] / df['views']).mean(),
-                        'avg_comments_per_view': (df['comments'] / df['views']).mean(),
-                        'engagement_trend': df.sort_values('published_at')
-                            .set_index('published_at')['engagement_rate'].rolling('30D').mean().to_dict()
-                    }
-                    
-            except Exception as e:
+        # Recent videos only (threshold truncated to the hour so the search stays cacheable)
+        now = pd.Timestamp.now(tz='UTC')
+        date_threshold = (now - pd.Timedelta(days=self.days_back)).floor('h').strftime(DATE_FORMAT)
+        
+        # Channels are independent, so they are analyzed concurrently
+        analyses = map_concurrent(
+            lambda channel_id: self._analyze_channel(youtube, channel_id, date_threshold),
+            self.competitor_channels
+        )
+        for channel_id, (analysis, error) in zip(self.competitor_channels, analyses):
+            if error is not None:
                 results["errors"] = results.get("errors", {})
-                results["errors"][channel_id] = str(e)
+                results["errors"][channel_id] = error
+            elif analysis is not None:
+                for section, value in analysis.items():
+                    results[section][channel_id] = value
         
         return results
+
+    def _analyze_channel(self, youtube, channel_id, date_threshold):
+        """Analyzes one competitor channel, returning (sections, error)"""
+        try:
+            # Get channel details
+            channel_response = execute(youtube.channels().list(
+                part='statistics,snippet,brandingSettings,contentDetails',
+                id=channel_id
+            ))
+            
+            if not channel_response['items']:
+                return None, None
+            
+            channel_data = channel_response['items'][0]
+            
+            # Get recent videos
+            videos_response = execute(youtube.search().list(
+                part='id,snippet',
+                channelId=channel_id,
+                order='date',
+                type='video',
+                publishedAfter=date_threshold,
+                maxResults=50
+            ))
+            
+            # Fetch statistics for all videos in a single call
+            videos = videos_response.get('items', [])
+            video_ids = [video['id']['videoId'] for video in videos]
+            stats_by_id = {}
+            if video_ids:
+                stats_response = execute(youtube.videos().list(
+                    part='statistics,contentDetails,snippet',
+                    id=','.join(video_ids)
+                ))
+                stats_by_id = {item['id']: item for item in stats_response.get('items', [])}
+
+            # Analyze videos
+            video_data = []
+            for video, video_id in zip(videos, video_ids):
+                video_stats = stats_by_id.get(video_id)
+                
+                if video_stats:
+                    if int(video_stats['statistics'].get('viewCount', 0)) >= self.min_views:
+                        video_data.append({
+                            'title': video['snippet']['title'],
+                            'description': video['snippet']['description'],
+                            'published_at': video['snippet']['publishedAt'],
+                            'views': int(video_stats['statistics'].get('viewCount', 0)),
+                            'likes': int(video_stats['statistics'].get('likeCount', 0)),
+                            'comments': int(video_stats['statistics'].get('commentCount', 0)),
+                            'duration': video_stats['contentDetails']['duration'],
+                            'tags': video_stats['snippet'].get('tags', [])
+                        })
+            
+            # Convert to DataFrame for analysis
+            df = pd.DataFrame(video_data)
+            if df.empty:
+                return None, None
+            
+            # Parse and sort by publish time once; the rolling trend below needs a monotonic index
+            df['published_at'] = pd.to_datetime(df['published_at'], format=DATE_FORMAT, utc=True, cache=True)
+            df = df.sort_values('published_at', ignore_index=True)
+            for column in ('views', 'likes', 'comments'):
+                df[column] = count_array(df[column])
+            df['engagement_rate'] = ((df['likes'] + df['comments']) / df['views'] * 100).round(2)
+            
+            # Analyze upload patterns
+            published = df['published_at'].dt
+            df['day_of_week'] = published.day_name().astype(DAY_OF_WEEK)
+            df['hour_of_day'] = published.hour
+            
+            # One groupby over (day, hour); per-day and per-hour means come from its sums and counts
+            slots = df.groupby(['day_of_week', 'hour_of_day'], observed=True)['views'].agg(['sum', 'count'])
+            by_day = slots.groupby(level='day_of_week', observed=True).sum()
+            by_hour = slots.groupby(level='hour_of_day').sum()
+            
+            return {
+                "channel_comparisons": {
+                    'name': channel_data['snippet']['title'],
+                    'subscribers': int(channel_data['statistics']['subscriberCount']),
+                    'total_views': int(channel_data['statistics']['viewCount']),
+                    'total_videos': int(channel_data['statistics']['videoCount']),
+                    'avg_views_per_video': int(df['views'].mean()),
+                    'avg_engagement_rate': float(df['engagement_rate'].mean())
+                },
+                "content_analysis": {
+                    'common_tags': self._analyze_tags(df),
+                    'title_patterns': self._analyze_titles(df),
+                    'description_patterns': self._analyze_descriptions(df)
+                },
+                "top_performing_content": df.nlargest(
+                    5, 'views'
+                )[['title', 'views', 'engagement_rate']].to_dict('records'),
+                "upload_patterns": {
+                    'best_days': (by_day['sum'] / by_day['count']).nlargest(3).to_dict(),
+                    'best_hours': (by_hour['sum'] / by_hour['count']).nlargest(3).to_dict(),
+                    'upload_frequency': f"{len(df) / (self.days_back / 30):.1f} videos per month"
+                },
+                "engagement_metrics": {
+                    'avg_likes_per_view': (df['likes'] / df['views']).mean(),
+                    'avg_comments_per_view': (df['comments'] / df['views']).mean(),
+                    'engagement_trend': df.set_index('published_at')['engagement_rate']
+                        .rolling('30D').mean().to_dict()
+                }
+            }, None
+                
+        except Exception as e:
+            return None, str(e)
     
     def _analyze_tags(self, df):
         """Analyzes common tags and their performance"""
-        all_tags = []
-        for tags in df['tags']:
-            all_tags.extend(tags)
-        
-        tag_counts = Counter(all_tags)
+        tag_counts = Counter(chain.from_iterable(df['tags']))
         return dict(tag_counts.most_common(10))
     
     def _analyze_titles(self, df):
         """Analyzes title patterns and their effectiveness"""
-        title_words = []
-        for title in df['title']:
-            title_words.extend(title.lower().split())
-        
-        word_counts = Counter(title_words)
+        word_counts = Counter(chain.from_iterable(df['title'].str.lower().str.split()))
         return dict(word_counts.most_common(10))
     
     def _analyze_descriptions(self, df):
         """Analyzes description patterns"""
-        desc_words = []
-        for desc in df['description']:
-            desc_words.extend(desc.lower().split())
-        
-        word_counts = Counter(desc_words)
+        word_counts = Counter(chain.from_iterable(df['description'].str.lower().str.split()))
         return dict(word_counts.most_common(10))
 
 if __name__ == "__main__":
@@ -2,16 +2,143 @@ from agency_swarm.tools import BaseTool
 from pydantic import Field
 import os
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from textblob import TextBlob
 import nltk
-from nltk.tokenize import sent_tokenize
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import spacy
 from transformers import pipeline
+import torch
 from collections import Counter
+from itertools import chain
+from functools import lru_cache, wraps
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import numpy as np
+import diskcache
+from content_creation_agency.common.youtube_api import DATE_FORMAT, youtube_service, execute
 
 load_dotenv()
 
+# Fetched comments are kept on disk for an hour, keyed on the fetch arguments
+COMMENTS_TTL = 60 * 60
+
+# Comments per forward pass of the sentiment model
+CPU_BATCH_SIZE = 32
+GPU_BATCH_SIZE = 128
+
+# Sentiment input cap; 128 tokens covers nearly all comments at 1/16 of the attention cost of 512
+MAX_COMMENT_CHARS = 512
+MAX_COMMENT_TOKENS = 128
+
+# Topic extraction: spaCy batch size and the parts of speech kept in a topic
+SPACY_BATCH_SIZE = 64
+TOPIC_POS = frozenset(("NOUN", "PROPN", "ADJ"))
+
+_cache = diskcache.Cache(os.path.expanduser("~/.cache/cca_youtube_comments"))
+
+_load_lock = threading.Lock()
+# Fast tokenizers raise "Already borrowed" when used from several threads at once
+_inference_lock = threading.Lock()
+
+def _load_once(loader):
+    """
+    lru_cache(maxsize=1) getter whose first call is serialized, so concurrent
+    runs from worker threads share a single load instead of racing
+    """
+    cached = lru_cache(maxsize=1)(loader)
+    
+    @wraps(loader)
+    def getter():
+        with _load_lock:
+            return cached()
+    return getter
+
+# NLP models are loaded on first use and shared across runs
+@_load_once
+def _nlp():
+    # noun_chunks needs the dependency parser, so only NER is disabled
+    return spacy.load("en_core_web_sm", disable=["ner"])
+
+@_load_once
+def _sentiment_pipeline():
+    """Sentiment model: FP16 on the first GPU, int8 linear layers on CPU"""
+    use_gpu = torch.cuda.is_available()
+    sentiment_analyzer = pipeline(
+        "sentiment-analysis",
+        model="distilbert-base-uncased-finetuned-sst-2-english",
+        device=0 if use_gpu else -1,
+        model_kwargs={"torch_dtype": torch.float16} if use_gpu else {}
+    )
+    if not use_gpu:
+        sentiment_analyzer.model = torch.quantization.quantize_dynamic(
+            sentiment_analyzer.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return sentiment_analyzer
+
+@_load_once
+def _vader():
+    nltk.download('vader_lexicon', quiet=True)
+    return SentimentIntensityAnalyzer()
+
+def _thread_records(item, include_replies):
+    """Records for a comment thread: the top-level comment followed by its replies"""
+    comment = item['snippet']['topLevelComment']['snippet']
+    records = [{
+        'text': comment['textDisplay'],
+        'likes': comment['likeCount'],
+        'published_at': comment['publishedAt']
+    }]
+    if include_replies and item.get('replies'):
+        records += [
+            {
+                'text': reply['snippet']['textDisplay'],
+                'likes': reply['snippet']['likeCount'],
+                'published_at': reply['snippet']['publishedAt'],
+                'is_reply': True
+            }
+            for reply in item['replies']['comments']
+        ]
+    return records
+
+@_cache.memoize(expire=COMMENTS_TTL)
+def _fetch_comments(video_id, max_comments, include_replies):
+    """Fetches up to max_comments comments (and optionally replies) for a video"""
+    youtube = youtube_service()
+    
+    def page_request(page_token, max_results):
+        return youtube.commentThreads().list(
+            part="snippet,replies",
+            videoId=video_id,
+            maxResults=max_results,
+            pageToken=page_token,
+            textFormat="plainText"
+        )
+    
+    comments_data = []
+    if max_comments <= 0:
+        return comments_data
+    
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        pending = prefetcher.submit(execute, page_request(None, min(100, max_comments)))
+        while pending is not None:
+            response = pending.result()
+            
+            # Request the next page before processing this one
+            pending = None
+            next_page_token = response.get('nextPageToken')
+            page_size = len(response['items'])
+            if include_replies:
+                page_size += sum(len(item['replies']['comments']) for item in response['items'] if item.get('replies'))
+            remaining = max_comments - len(comments_data) - page_size
+            if next_page_token and remaining > 0:
+                pending = prefetcher.submit(execute, page_request(next_page_token, min(100, remaining)))
+            
+            comments_data.extend(chain.from_iterable(
+                _thread_records(item, include_replies) for item in response['items']
+            ))
+    
+    return comments_data
+
 class SentimentAnalyzer(BaseTool):
     """
     Analyzes sentiment and key themes in YouTube comments using advanced NLP techniques
@@ -30,109 +157,53 @@ class SentimentAnalyzer(BaseTool):
         """
         Analyzes YouTube comments using sentiment analysis and topic extraction
         """
-        youtube = build('youtube', 'v3', 
-                       developerKey=os.getenv('YOUTUBE_API_KEY'))
-        
-        # Initialize sentiment analyzer
-        sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english",
-            device=-1  # Use CPU
-        )
+        sentiment_analyzer = _sentiment_pipeline()
         
         # Get comments
-        comments_data = []
-        next_page_token = None
-        
-        while len(comments_data) < self.max_comments:
-            request = youtube.commentThreads().list(
-                part="snippet,replies",
-                videoId=self.video_id,
-                maxResults=min(100, self.max_comments - len(comments_data)),
-                pageToken=next_page_token,
-                textFormat="plainText"
-            )
-            
-            try:
-                response = request.execute()
-            except Exception as e:
-                return f"Error fetching comments: {str(e)}"
-            
-            for item in response['items']:
-                comment = item['snippet']['topLevelComment']['snippet']
-                comments_data.append({
-                    'text': comment['textDisplay'],
-                    'likes': comment['likeCount'],
-                    'published_at': comment['publishedAt']
-                })
-                
-                # Include replies if requested
-                if self.include_replies and item.get('replies'):
-                    for reply in item['replies']['comments']:
-                        reply_snippet = reply['snippet']
-                        comments_data.append({
-                            'text': reply_snippet['textDisplay'],
-                            'likes': reply_snippet['likeCount'],
-                            'published_at': reply_snippet['publishedAt'],
-                            'is_reply': True
-                        })
-            
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
-                break
+        try:
+            comments_data = _fetch_comments(self.video_id, self.max_comments, self.include_replies)
+        except Exception as e:
+            return f"Error fetching comments: {str(e)}"
         
         # Convert to DataFrame for analysis
         df = pd.DataFrame(comments_data)
         
-        # Analyze sentiment
-        sentiments = []
-        for text in df['text']:
-            # TextBlob analysis for polarity and subjectivity
-            blob = TextBlob(text)
-            
-            # Transformer-based sentiment analysis
-            transformer_sentiment = sentiment_analyzer(text[:512])[0]  # Limit text length
-            
-            sentiments.append({
-                'polarity': blob.sentiment.polarity,
-                'subjectivity': blob.sentiment.subjectivity,
-                'label': transformer_sentiment['label'],
-                'score': transformer_sentiment['score']
-            })
-        
-        sentiment_df = pd.DataFrame(sentiments)
+        # Score each distinct text once and map the results back to every comment
+        unique_texts, inverse = np.unique(df['text'].to_numpy(dtype=object), return_inverse=True)
+        unique_texts = unique_texts.tolist()
         
-        # Extract key themes and topics
-        all_sentences = []
-        for text in df['text']:
-            all_sentences.extend(sent_tokenize(text))
+        # Analyze sentiment: the pipeline batches all texts in one call
+        # Only long comments are sliced before tokenizing; short ones are passed as is
+        snippets = [text if len(text) <= MAX_COMMENT_CHARS else text[:MAX_COMMENT_CHARS] for text in unique_texts]
+        with _inference_lock:
+            unique_sentiments = pd.DataFrame(sentiment_analyzer(
+                snippets,
+                batch_size=GPU_BATCH_SIZE if torch.cuda.is_available() else CPU_BATCH_SIZE,
+                truncation=True,
+                max_length=MAX_COMMENT_TOKENS
+            ))
         
-        # Download required NLTK data
-        nltk.download('punkt', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
+        # VADER compound score as polarity (-1 to 1), no tagging needed
+        sia = _vader()
+        unique_sentiments['polarity'] = np.array([sia.polarity_scores(text)['compound'] for text in unique_texts])
+        sentiment_df = unique_sentiments.iloc[inverse].reset_index(drop=True)
         
-        # Extract noun phrases as topics
-        topics = []
-        for sentence in all_sentences:
-            tokens = nltk.word_tokenize(sentence)
-            tagged = nltk.pos_tag(tokens)
-            
-            current_topic = []
-            for word, tag in tagged:
-                if tag.startswith(('NN', 'JJ')):  # Nouns and adjectives
-                    current_topic.append(word)
-                elif current_topic:
-                    topics.append(' '.join(current_topic))
-                    current_topic = []
-            
-            if current_topic:
-                topics.append(' '.join(current_topic))
+        # Extract noun phrases as topics, tagging all texts in batches
+        unique_topics = [
+            [
+                topic
+                for chunk in doc.noun_chunks
+                # Keep nouns and adjectives only, dropping determiners and pronoun chunks
+                if (topic := ' '.join(token.text for token in chunk if token.pos_ in TOPIC_POS))
+            ]
+            for doc in _nlp().pipe(unique_texts, batch_size=SPACY_BATCH_SIZE)
+        ]
+        topics = list(chain.from_iterable(unique_topics[i] for i in inverse))
         
         # Compile results
         results = {
             'overall_sentiment': {
                 'average_polarity': sentiment_df['polarity'].mean(),
-                'average_subjectivity': sentiment_df['subjectivity'].mean(),
                 'positive_percentage': (sentiment_df['label'] == 'POSITIVE').mean() * 100,
                 'sentiment_distribution': sentiment_df['label'].value_counts().to_dict()
             },
@@ -147,18 +218,22 @@ class SentimentAnalyzer(BaseTool):
             },
             'temporal_analysis': {
                 'sentiment_trend': df.assign(
-                    date=pd.to_datetime(df['published_at']).dt.date
+                    date=pd.to_datetime(df['published_at'], format=DATE_FORMAT, utc=True, cache=True).dt.date
                 ).groupby('date')['likes'].mean().to_dict()
             }
         }
         
-        # Add sentiment by topic
-        for topic in results['key_themes']['top_topics']:
-            topic_comments = df[df['text'].str.contains(topic, case=False)]
-            if not topic_comments.empty:
-                topic_sentiments = [TextBlob(text).sentiment.polarity 
-                                  for text in topic_comments['text']]
-                results['key_themes']['topic_sentiment'][topic] = sum(topic_sentiments) / len(topic_sentiments)
+        # Add sentiment by topic: average polarity over the comments each top topic was extracted from
+        top_topics = list(results['key_themes']['top_topics'])
+        pairs = pd.DataFrame({
+            'comment': np.repeat(np.arange(len(inverse)), [len(unique_topics[i]) for i in inverse]),
+            'topic': topics
+        }).drop_duplicates()
+        pairs = pairs[pairs['topic'].isin(top_topics)]
+        pairs['polarity'] = sentiment_df['polarity'].to_numpy()[pairs['comment'].to_numpy()]
+        results['key_themes']['topic_sentiment'] = (
+            pairs.groupby('topic')['polarity'].mean().reindex(top_topics).to_dict()
+        )
         
         return results
 